@@ -0,0 +1,139 @@
+from __future__ import annotations
+from collections import deque
+from dataclasses import dataclass
+
+from razine import (
+    Pos, Feature, EntityStore, RegionMap, build_walkable, build_graph, build_level,
+    Door, Key, Axe, Paper, Tree, Exit, Terminal, Bars
+)
+
+KEY, PAPER, AXE, WOOD, TERMINAL, BRIDGE = "key", "paper", "axe", "wood", "terminal", "bridge"
+ALL_UNLOCKS = frozenset((KEY, PAPER, AXE, WOOD, TERMINAL))
+
+LOCKS = {Door: KEY, Bars: TERMINAL}
+GAINS = {
+    Key: (KEY, None),
+    Paper: (PAPER, None),
+    Axe: (AXE, None),
+    Tree: (WOOD, AXE),
+    Terminal: (TERMINAL, PAPER),
+}
+
+@dataclass(frozen=True, slots=True)
+class Exploration:
+    escaped: bool
+    order: tuple[str, ...]
+    reached: frozenset[int]
+    bridges: tuple[int, ...]
+
+@dataclass(frozen=True, slots=True)
+class SolvabilityReport:
+    solvable: bool
+    unlock_order: tuple[str, ...]
+    unreachable: tuple[Feature, ...]
+    bridges: tuple[int, ...]
+
+def explore(graf: dict[Pos, list[Pos]], start: Pos, features: EntityStore, regions: RegionMap,
+            allowed: frozenset[str] = ALL_UNLOCKS, stop_at_exit: bool = False,
+            closed: frozenset[int] = frozenset()) -> Exploration:
+    have: set[str] = set()
+    order: list[str] = []
+    reached: set[int] = set()
+    bridges: list[int] = []
+    waiting: dict[str, list[Pos]] = {}
+    pending: dict[str, list[str]] = {}
+    seen = {start}
+    q = deque([start])
+
+    def is_open(lock: str) -> bool:
+        if lock == BRIDGE:
+            return AXE in have and WOOD in have
+        return lock in have
+
+    def gain(cap: str):
+        if cap in have or cap not in allowed:
+            return
+        have.add(cap)
+        order.append(cap)
+        q.extend(waiting.pop(cap, ()))
+        if is_open(BRIDGE):
+            q.extend(waiting.pop(BRIDGE, ()))
+        for c in pending.pop(cap, ()):
+            gain(c)
+
+    escaped = False
+    while q:
+        u = q.popleft()
+        f = features.at(u)
+        if f is not None:
+            reached.add(f.id)
+            if type(f) is Exit:
+                escaped = True
+                if stop_at_exit:
+                    break
+            g = GAINS.get(type(f))
+            if g is not None:
+                cap, need = g
+                if need is None or need in have:
+                    gain(cap)
+                else:
+                    pending.setdefault(need, []).append(cap)
+        r = regions.blocking(u)
+        if r is not None and r.id not in bridges:
+            bridges.append(r.id)
+            order.append(f"{BRIDGE} {r.id}")
+
+        for v in graf.get(u, []):
+            if v in seen:
+                continue
+            seen.add(v)
+            fv = features.at(v)
+            lock = LOCKS.get(type(fv)) if fv is not None else None
+            rv = regions.blocking(v)
+            if rv is not None and rv.id in closed:
+                continue
+            if lock is None and rv is not None:
+                lock = BRIDGE
+            if lock is None or is_open(lock):
+                q.append(v)
+            else:
+                waiting.setdefault(lock, []).append(v)
+
+    return Exploration(escaped, tuple(order), frozenset(reached), tuple(bridges))
+
+def analyse(graf: dict[Pos, list[Pos]], start: Pos, features: EntityStore,
+            regions: RegionMap) -> SolvabilityReport:
+    full = explore(graf, start, features, regions)
+    unreachable = tuple(f for f in features if f.id not in full.reached)
+    if not full.escaped:
+        return SolvabilityReport(False, (), unreachable, ())
+
+    prereq = {need: cap for cap, need in GAINS.values() if need is not None}
+    needed = [c for c in full.order if c in ALL_UNLOCKS]
+    for cap in reversed(needed[:]):
+        if prereq.get(cap) in needed:
+            continue
+        trial = frozenset(c for c in needed if c != cap)
+        if explore(graf, start, features, regions, trial, stop_at_exit=True).escaped:
+            needed.remove(cap)
+    allowed = frozenset(needed)
+
+    closed: frozenset[int] = frozenset()
+    for rid in reversed(explore(graf, start, features, regions, allowed, stop_at_exit=True).bridges):
+        if explore(graf, start, features, regions, allowed, True, closed | {rid}).escaped:
+            closed |= {rid}
+    best = explore(graf, start, features, regions, allowed, True, closed)
+    return SolvabilityReport(True, best.order, unreachable, best.bridges)
+
+def analyse_level(walkable: set[Pos], features: EntityStore, regions: RegionMap,
+                  start: Pos) -> SolvabilityReport:
+    return analyse(build_graph(walkable), start, features, regions)
+
+if __name__ == "__main__":
+    _, features, regions, start = build_level()
+    rep = analyse_level(build_walkable(), features, regions, start)
+    print("rješivo:", "da" if rep.solvable else "ne")
+    print("redoslijed otključavanja:", " -> ".join(rep.unlock_order) or "-")
+    print("mostovi:", ", ".join(map(str, rep.bridges)) or "-")
+    for f in rep.unreachable:
+        print("nedostupno:", type(f).__name__, (f.pos.x, f.pos.y))
@@ -1,38 +1,49 @@
+import os
 import random
-import pygame
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from collections import deque
 
-from razine import (
-    Pos, GameMap, build_walkable, build_level,
-    Feature, Door, Key, Axe, Paper, Tree, Exit, Terminal, Bars
-)
+_T_IMPORT = time.perf_counter()
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+import pygame
 
-pygame.init()
+from pravila import AutoPilot, GameState
+from razine import Pos, GameMap, build_walkable, build_level, Paper
 
 CELL = 40
-W, H = 11, 17
+VIEW_W, VIEW_H = 11, 13
+ZOOM_LEVELS = (0.5, 0.75, 1.0, 1.5, 2.0)
 SECRET_CODE = "2004"
 
 COLOR_WALK = (255, 255, 255)
 COLOR_WALL = (55, 55, 55)
 GRID_COLOR = (0, 0, 0)
+PLACEHOLDER_COLOR = (170, 170, 170)
 
 MODE_PLAY, MODE_PAPER, MODE_CODE, MODE_EXIT = "play", "paper", "code", "exit"
 AUTO_STEP_MS = 70
 AUTO_CODE_STEP_MS = 260
-DIRS4 = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-INF = 10**9
+SPRITE_KEYS = (
+    "igrac", "vrata", "kljuc", "sjekira", "terminal", "resetke",
+    "papir", "papirus", "zastava", "drvo", "voda", "most"
+)
+SPRITE_CACHE_BYTES = 32 * 1024 * 1024
+MIP_MIN = 16
+CELL_STEP = 8
+PAPER_STEP = 64
+SPRITE_MAX_PX_BY_KEY = {"papir": 1024}
+TIMING = bool(os.environ.get("ESCAPE_TIMING"))
 
-screen = pygame.display.set_mode((W * CELL, H * CELL))
-pygame.display.set_caption("Escape Room")
-clock = pygame.time.Clock()
+screen = None
+clock = None
 
 class Popup:
     def __init__(self):
         self.text = ""
         self.until = 0
-        self.font = pygame.font.SysFont(None, 26)
 
     def show(self, text: str, ms: int = 1700):
         self.text = text
@@ -42,7 +53,7 @@ class Popup:
         if not (self.text and pygame.time.get_ticks() < self.until):
             return
         pad = 12
-        txt = self.font.render(self.text, True, (255, 255, 255))
+        txt = F(26).render(self.text, True, (255, 255, 255))
         w, h = txt.get_width() + pad * 2, txt.get_height() + pad * 2
         x, y = (surf.get_width() - w) // 2, 10
         r = pygame.Rect(x, y, w, h)
@@ -64,397 +75,242 @@ def load_sprite(name: str):
     fp = asset_dir / f"{name}.png"
     if not fp.exists():
         return None
-    img = pygame.image.load(str(fp)).convert_alpha()
-    return pygame.transform.smoothscale(img, (CELL, CELL))
-
-def scale_sprite(surf, wc, hc):
-    return None if surf is None else pygame.transform.smoothscale(surf, (CELL * wc, CELL * hc))
+    img = pygame.image.load(str(fp))
+    if img.get_bitsize() != 32 or not img.get_flags() & pygame.SRCALPHA:
+        out = pygame.Surface(img.get_size(), pygame.SRCALPHA, 32)
+        out.blit(img, (0, 0))
+        img = out
+    return img
+
+def surface_bytes(surf) -> int:
+    return surf.get_pitch() * surf.get_height()
+
+def build_mips(name: str, cap: int):
+    img = load_sprite(name)
+    if img is None:
+        return None
+    iw, ih = img.get_size()
+    if max(iw, ih) > cap:
+        sc = cap / max(iw, ih)
+        img = pygame.transform.smoothscale(img, (max(1, round(iw * sc)), max(1, round(ih * sc))))
+    chain = [img]
+    while True:
+        lw, lh = chain[-1].get_size()
+        if min(lw, lh) // 2 < MIP_MIN:
+            return chain
+        chain.append(pygame.transform.smoothscale(chain[-1], (lw // 2, lh // 2)))
+
+class SpriteCache:
+    def __init__(self, budget_bytes: int = SPRITE_CACHE_BYTES):
+        self.budget = budget_bytes
+        self.used = 0
+        self._src = {}
+        self._mips = {}
+        self._scaled = OrderedDict()
+        self._pending = {}
+        self._loader = None
+        self.max_px = round(CELL * ZOOM_LEVELS[-1])
+
+    def prefetch(self, keys):
+        for key in keys:
+            self.source(key)
+
+    def loading(self, key: str) -> bool:
+        return key in self._pending and self.source(key) is None
+
+    def source(self, key: str):
+        if key in self._src:
+            return self._src[key]
+        fut = self._pending.get(key)
+        if fut is None:
+            if self._loader is None:
+                self._loader = ThreadPoolExecutor(2, thread_name_prefix="sprites")
+            cap = SPRITE_MAX_PX_BY_KEY.get(key, self.max_px)
+            self._pending[key] = self._loader.submit(build_mips, key, cap)
+            return None
+        if not fut.done():
+            return None
+        del self._pending[key]
+        chain = fut.result()
+        self._src[key] = None if chain is None else chain[0]
+        if chain is not None:
+            self._mips[key] = chain
+            self.used += sum(surface_bytes(m) for m in chain)
+            self._evict()
+        return self._src[key]
+
+    def _evict(self):
+        while self.used > self.budget and self._scaled:
+            _, old = self._scaled.popitem(last=False)
+            self.used -= surface_bytes(old)
+
+    def _mip(self, key: str, w: int, h: int):
+        chain = self._mips[key]
+        for surf in reversed(chain):
+            sw, sh = surf.get_size()
+            if sw >= w and sh >= h:
+                return surf
+        return chain[0]
+
+    def get(self, key: str, w: int, h: int | None = None):
+        h = w if h is None else h
+        ck = (key, w, h)
+        surf = self._scaled.get(ck)
+        if surf is not None:
+            self._scaled.move_to_end(ck)
+            return surf
+        if self.source(key) is None or w <= 0 or h <= 0:
+            return None
+        surf = pygame.transform.smoothscale(self._mip(key, w, h), (w, h)).convert_alpha()
+        self.used += surface_bytes(surf)
+        self._evict()
+        self._scaled[ck] = surf
+        return surf
+
+    def cached(self, key: str, w: int, h: int | None = None) -> bool:
+        return (key, w, w if h is None else h) in self._scaled
+
+    def warm(self, keys, size: int, budget: int = 1):
+        for key in keys:
+            if budget <= 0:
+                return
+            if self.cached(key, size) or self.source(key) is None:
+                continue
+            self.get(key, size)
+            budget -= 1
 
-sprites = {k: load_sprite(k) for k in (
-    "igrac", "vrata", "kljuc", "sjekira", "terminal", "resetke",
-    "papir", "papirus", "zastava", "drvo", "voda", "most"
-)}
+sprite_cache = SpriteCache()
 
-paper_original = None
-pp = asset_dir / "papir.png"
-if pp.exists():
-    paper_original = pygame.image.load(str(pp)).convert_alpha()
+def snap(n: int, step: int) -> int:
+    return n // step * step if n >= step else max(1, n)
 
-def blit_cell(key: str, p: Pos):
-    spr = sprites.get(key)
-    if spr:
-        screen.blit(spr, (p.x * CELL, p.y * CELL))
+def fit_cell(view_w: int, view_h: int) -> int:
+    return snap(min(view_w // VIEW_W, view_h // VIEW_H), CELL_STEP)
 
-walkable = build_walkable()
-game_map = GameMap(W, H, walkable)
-player, features, sea, start_pos = build_level()
+def max_cell_px() -> int:
+    sizes = pygame.display.get_desktop_sizes() or [(VIEW_W * CELL, VIEW_H * CELL)]
+    return max(round(fit_cell(w, h) * ZOOM_LEVELS[-1]) for w, h in sizes)
 
-sea_big = scale_sprite(sprites.get("voda"), sea.width_cells, sea.height_cells)
-bridge_big = scale_sprite(sprites.get("most"), sea.width_cells, sea.height_cells)
+class Camera:
+    def __init__(self, view_w: int, view_h: int):
+        self.zoom_i = ZOOM_LEVELS.index(1.0)
+        self.x = self.y = 0
+        self.resize(view_w, view_h)
 
-feat_at = {f.pos: f for f in features}
-def remove_feature(f: Feature):
-    if f in features:
-        features.remove(f)
-        feat_at.pop(f.pos, None)
+    def resize(self, view_w: int, view_h: int):
+        self.view_w, self.view_h = view_w, view_h
+        self.base_cell = fit_cell(view_w, view_h)
 
-has_key = has_axe = has_wood = has_paper = False
-bridge_built = terminal_unlocked = False
-mode = MODE_PLAY
-code_input = ""
+    @property
+    def cell(self) -> int:
+        return max(1, round(self.base_cell * ZOOM_LEVELS[self.zoom_i]))
 
-exit_start_ms = 0
-confetti = []
-game_finished = False
-
-graf = {}
-for p in walkable:
-    graf[p] = [Pos(p.x + dx, p.y + dy) for dx, dy in DIRS4 if Pos(p.x + dx, p.y + dy) in walkable]
-
-def bfs_tree(start: Pos):
-    q = deque([start])
-    vis = {start}
-    parent = {start: None}
-    order = []
-    while q:
-        u = q.popleft()
-        order.append(u)
-        for v in graf.get(u, []):
-            if v not in vis:
-                vis.add(v)
-                parent[v] = u
-                q.append(v)
-    return order, parent
-
-def dfs_tree(start: Pos):
-    st = [start]
-    vis = set()
-    parent = {start: None}
-    order = []
-    while st:
-        u = st.pop()
-        if u in vis:
-            continue
-        vis.add(u)
-        order.append(u)
-        for v in reversed(graf.get(u, [])):
-            if v not in vis:
-                parent.setdefault(v, u)
-                st.append(v)
-    return order, parent
-
-def tree_path_between(a: Pos, b: Pos, parent):
-    if a == b:
-        return []
-    anc = set()
-    x = a
-    while x is not None:
-        anc.add(x)
-        x = parent.get(x)
-
-    path_b = []
-    y = b
-    while y not in anc and y is not None:
-        path_b.append(y)
-        y = parent.get(y)
-
-    lca = y
-    if lca is None:
-        return []
-
-    up = []
-    x = a
-    while x != lca and x is not None:
-        x = parent.get(x)
-        if x is None:
-            return []
-        up.append(x)
-
-    return up + list(reversed(path_b))
-
-def is_sea(p: Pos):
-    return sea.contains(p)
-
-def manhattan(a: Pos, b: Pos):
-    return abs(a.x - b.x) + abs(a.y - b.y)
-
-def find_positions(cls):
-    return [f.pos for f in features if isinstance(f, cls)]
-
-def find_first(cls):
-    for f in features:
-        if isinstance(f, cls):
-            return f.pos
-    return None
-
-def nearest(cls):
-    pts = find_positions(cls)
-    return min(pts, key=lambda p: manhattan(player.pos, p)) if pts else None
-
-def nearest_sea_entry():
-    entries = []
-    for sc in sea.cells():
-        for dx, dy in DIRS4:
-            if Pos(sc.x + dx, sc.y + dy) in walkable:
-                entries.append(sc)
-                break
-    return min(entries, key=lambda p: manhattan(player.pos, p)) if entries else None
+    def zoom(self, step: int) -> bool:
+        i = max(0, min(len(ZOOM_LEVELS) - 1, self.zoom_i + step))
+        if i == self.zoom_i:
+            return False
+        self.zoom_i = i
+        return True
 
-def start_exit_animation():
-    global mode, exit_start_ms, confetti
-    mode = MODE_EXIT
-    exit_start_ms = pygame.time.get_ticks()
-    confetti = []
-    cx = player.pos.x * CELL + CELL // 2
-    cy = player.pos.y * CELL + CELL // 2
-    for _ in range(160):
-        confetti.append([cx, cy, random.uniform(-3.2, 3.2), random.uniform(-5.0, -1.2), random.uniform(0.5, 1.2)])
+    def follow(self, p: Pos, map_w: int, map_h: int):
+        c = self.cell
+        self.x = self._clamp(p.x * c + c // 2 - self.view_w // 2, map_w * c, self.view_w)
+        self.y = self._clamp(p.y * c + c // 2 - self.view_h // 2, map_h * c, self.view_h)
 
-def finish_game():
-    global game_finished
-    game_finished = True
-    stop_auto()
-    popup.show("Kraj", 4000)
+    @staticmethod
+    def _clamp(v: int, world: int, view: int) -> int:
+        if world <= view:
+            return (world - view) // 2
+        return max(0, min(world - view, v))
 
-def can_enter(p: Pos):
-    global bridge_built
-    if game_finished:
-        return False
+    def visible_cells(self, map_w: int, map_h: int):
+        c = self.cell
+        x0, y0 = max(0, self.x // c), max(0, self.y // c)
+        x1 = min(map_w - 1, (self.x + self.view_w - 1) // c)
+        y1 = min(map_h - 1, (self.y + self.view_h - 1) // c)
+        return x0, y0, x1, y1
 
-    f = feat_at.get(p)
+    def to_screen(self, p: Pos):
+        c = self.cell
+        return p.x * c - self.x, p.y * c - self.y
 
-    if isinstance(f, Door):
-        if not has_key:
-            popup.show("Vrata su zaključana")
-            return False
-        remove_feature(f)
-        popup.show("Vrata su otključana")
-        return True
+camera = Camera(VIEW_W * CELL, VIEW_H * CELL)
 
-    if isinstance(f, Bars):
-        if terminal_unlocked:
-            remove_feature(f)
-            return True
-        popup.show("Rešetka je spuštena. Upiši šifru")
-        return False
+def blit_cell(key: str, p: Pos):
+    spr = sprite_cache.get(key, camera.cell)
+    if spr:
+        screen.blit(spr, camera.to_screen(p))
+    elif sprite_cache.loading(key):
+        c = camera.cell
+        x, y = camera.to_screen(p)
+        pygame.draw.rect(screen, PLACEHOLDER_COLOR, (x + c // 4, y + c // 4, c // 2, c // 2), border_radius=c // 8)
 
-    if is_sea(p) and not bridge_built:
-        if has_axe and has_wood:
-            bridge_built = True
-            popup.show("Most je izgrađen")
-            return True
-        popup.show("Treba ti sjekira i drvo za izgradnju mosta", 2200)
-        return False
+mode = MODE_PLAY
+code_input = ""
 
-    return True
+exit_start_ms = 0
+confetti = []
 
-auto_active = False
-auto_kind = None
-auto_targets = []
-auto_parent = {}
-auto_subpath = []
-auto_target = None
 auto_last_step = 0
-
 auto_code_active = False
 auto_code_i = 0
 auto_code_next = 0
 
-def stop_auto():
-    global auto_active, auto_kind, auto_targets, auto_parent, auto_subpath, auto_target, auto_code_active
-    auto_active = False
-    auto_kind = None
-    auto_targets = []
-    auto_parent = {}
-    auto_subpath = []
-    auto_target = None
-    auto_code_active = False
-
-def dfs_restart_from_here():
-    global auto_targets, auto_parent, auto_subpath, auto_target, auto_last_step
-    if not auto_active or auto_kind != "dfs":
-        return
-    order, parent = dfs_tree(player.pos)
-    auto_targets, auto_parent = order[:], parent
-    auto_subpath, auto_target = [], None
-    auto_last_step = pygame.time.get_ticks()
+class Game(GameState):
+    def message(self, text: str, ms: int = 1700):
+        popup.show(text, ms)
 
-def try_collect(p: Pos):
-    global has_key, has_axe, has_wood, has_paper, mode, code_input
-    if game_finished:
-        return
-
-    f = feat_at.get(p)
-    if not f:
-        return
-
-    def on_change():
-        if auto_active and auto_kind == "dfs":
-            dfs_restart_from_here()
-        if auto_active and auto_kind == "astar":
-            astar_replan()
-
-    if isinstance(f, Key):
-        has_key = True
-        remove_feature(f)
-        popup.show("Ključ pokupljen")
-        on_change()
-        return
-
-    if isinstance(f, Axe):
-        has_axe = True
-        remove_feature(f)
-        popup.show("Sjekira pokupljena")
-        on_change()
-        return
-
-    if isinstance(f, Paper):
-        has_paper = True
-        remove_feature(f)
+    def on_paper(self):
+        global mode
         mode = MODE_PAPER
-        on_change()
-        return
-
-    if isinstance(f, Tree):
-        if not has_axe:
-            popup.show("Treba ti sjekira da posiječeš drvo")
-            return
-        has_wood = True
-        remove_feature(f)
-        popup.show("Posijekao si drvo za most")
-        on_change()
-        return
 
-    if isinstance(f, Terminal):
-        if not has_paper:
-            popup.show("Upiši šifru")
-            return
-        if terminal_unlocked:
-            popup.show("Terminal je već otključan.")
-            return
-        code_input = ""
+    def on_code_prompt(self):
+        global mode, code_input, auto_code_active, auto_code_i, auto_code_next
         mode = MODE_CODE
-        popup.show(f"Upiši šifru ({len(SECRET_CODE)} znamenke) i ENTER.", 2400)
-        return
-
-    if isinstance(f, Bars):
-        popup.show("Rešetka je spuštena. Upiši šifru")
-        return
+        code_input = ""
+        auto_code_active = True
+        auto_code_i = 0
+        auto_code_next = pygame.time.get_ticks() + AUTO_CODE_STEP_MS
+        popup.show("Upisivanje šifre", 1500)
 
-    if isinstance(f, Exit):
+    def on_exit(self):
+        global auto_code_active
+        auto_code_active = False
         start_exit_animation()
-        finish_game()
-        return
+        popup.show("Kraj", 4000)
 
-def passable_plan(p: Pos):
-    f = feat_at.get(p)
-    if isinstance(f, Door) and not has_key:
-        return False
-    if isinstance(f, Bars) and not terminal_unlocked:
-        return False
-    if is_sea(p) and not bridge_built:
-        return bool(has_axe and has_wood)
-    return True
+state: Game | None = None
 
-def astar_path(start: Pos, goal: Pos):
-    if start == goal:
-        return []
-    open_set = {start}
-    came = {}
-    g = {start: 0}
-    f = {start: manhattan(start, goal)}
-
-    while open_set:
-        cur = min(open_set, key=lambda p: f.get(p, INF))
-        if cur == goal:
-            out = []
-            x = goal
-            while x != start:
-                out.append(x)
-                x = came[x]
-            out.reverse()
-            return out
-
-        open_set.remove(cur)
-        for nb in graf.get(cur, []):
-            if not passable_plan(nb):
-                continue
-            tg = g[cur] + 1
-            if tg < g.get(nb, INF):
-                came[nb] = cur
-                g[nb] = tg
-                f[nb] = tg + manhattan(nb, goal)
-                open_set.add(nb)
-    return []
+def set_zoom(step: int):
+    camera.zoom(step)
 
-def start_auto(kind: str):
-    global auto_active, auto_kind, auto_targets, auto_parent, auto_subpath, auto_target, auto_last_step
-    if kind == "bfs":
-        order, parent = bfs_tree(player.pos)
-    else:
-        order, parent = dfs_tree(player.pos)
-    auto_active, auto_kind = True, kind
-    auto_targets, auto_parent = order[:], parent
-    auto_subpath, auto_target = [], None
-    auto_last_step = pygame.time.get_ticks()
+def start_exit_animation():
+    global mode, exit_start_ms, confetti
+    mode = MODE_EXIT
+    exit_start_ms = pygame.time.get_ticks()
+    confetti = []
+    sx, sy = camera.to_screen(state.player.pos)
+    cx = sx + camera.cell // 2
+    cy = sy + camera.cell // 2
+    for _ in range(160):
+        confetti.append([cx, cy, random.uniform(-3.2, 3.2), random.uniform(-5.0, -1.2), random.uniform(0.5, 1.2)])
 
-def astar_next_goal():
-    if not has_key:
-        return nearest(Key)
-    d = find_first(Door)
-    if d is not None:
-        return d
-    if not has_paper:
-        return nearest(Paper)
-    if not has_axe:
-        return nearest(Axe)
-    if not has_wood:
-        return nearest(Tree)
-    if not bridge_built:
-        return nearest_sea_entry()
-    if not terminal_unlocked:
-        return nearest(Terminal)
-    return find_first(Exit)
-
-def astar_replan():
-    global auto_subpath, auto_target
-    if not auto_active or auto_kind != "astar":
-        return
-    goal = astar_next_goal()
-    if goal is None:
-        popup.show("Nema cilja na mapi")
-        stop_auto()
-        return
-    path = astar_path(player.pos, goal)
-    if not path:
-        stop_auto()
-        return
-    auto_subpath, auto_target = path[:], goal
+def stop_auto():
+    global auto_code_active
+    if state.auto is not None:
+        state.auto.stop()
+    auto_code_active = False
 
-def start_auto_astar():
-    global auto_active, auto_kind, auto_subpath, auto_target, auto_last_step
-    auto_active, auto_kind = True, "astar"
-    auto_subpath, auto_target = [], None
+def start_auto(kind: str):
+    global auto_last_step
     auto_last_step = pygame.time.get_ticks()
-    popup.show("A* pretraživanje", 1500)
-    astar_replan()
-
-def auto_try_terminal():
-    global mode, code_input, auto_code_active, auto_code_i, auto_code_next
-    if game_finished:
-        return
-    f = feat_at.get(player.pos)
-    if isinstance(f, Terminal) and has_paper and not terminal_unlocked:
-        mode = MODE_CODE
-        code_input = ""
-        auto_code_active = True
-        auto_code_i = 0
-        auto_code_next = pygame.time.get_ticks() + AUTO_CODE_STEP_MS
-        popup.show("Upisivanje šifre", 1500)
+    if kind == "astar":
+        popup.show("A* pretraživanje", 1500)
+    AutoPilot(state, kind).start()
 
 def auto_type_code():
-    global terminal_unlocked, mode, code_input, auto_code_active, auto_code_i, auto_code_next
-    if game_finished:
+    global mode, code_input, auto_code_active, auto_code_i, auto_code_next
+    if state.finished:
         auto_code_active = False
         return
     if not auto_code_active or mode != MODE_CODE:
@@ -468,109 +324,73 @@ def auto_type_code():
         auto_code_i += 1
         auto_code_next = now + AUTO_CODE_STEP_MS
         return
-    terminal_unlocked = True
     auto_code_active = False
     popup.show("Uspješno upisana lozinka. Rešetka je podignuta", 1400)
     mode = MODE_PLAY
-    if auto_active and auto_kind == "dfs":
-        dfs_restart_from_here()
-    if auto_active and auto_kind == "astar":
-        astar_replan()
+    state.unlock_terminal()
 
 def update_auto():
-    global auto_last_step, auto_subpath, auto_target
-
-    if game_finished or not auto_active or mode != MODE_PLAY:
+    global auto_last_step
+    if state.finished or state.auto is None or mode != MODE_PLAY:
         return
-
     now = pygame.time.get_ticks()
     if now - auto_last_step < AUTO_STEP_MS:
         return
     auto_last_step = now
-
-    if auto_kind == "astar":
-        if not auto_subpath:
-            astar_replan()
-            if not auto_subpath:
-                return
-
-        nxt = auto_subpath[0]
-        if not can_enter(nxt):
-            astar_replan()
-            return
-
-        auto_subpath.pop(0)
-        player.pos = nxt
-        try_collect(player.pos)
-        auto_try_terminal()
-
-        if auto_target == player.pos and auto_active and auto_kind == "astar":
-            astar_replan()
-        return
-
-    while not auto_subpath:
-        if not auto_targets:
-            stop_auto()
-            return
-        t = auto_targets.pop(0)
-        if t == player.pos:
-            continue
-        auto_target = t
-        auto_subpath = tree_path_between(player.pos, t, auto_parent)
-        if not auto_subpath:
-            auto_target = None
-
-    nxt = auto_subpath[0]
-    if not can_enter(nxt):
-        if auto_target is not None:
-            auto_targets.append(auto_target)
-        auto_subpath, auto_target = [], None
-        return
-
-    auto_subpath.pop(0)
-    player.pos = nxt
-    try_collect(player.pos)
-    auto_try_terminal()
-    if auto_target == player.pos:
-        auto_target = None
+    state.auto.step()
 
 def draw_dim(alpha=190):
     s = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
     s.fill((0, 0, 0, alpha))
     screen.blit(s, (0, 0))
 
-def draw_tiles():
-    for y in range(H):
-        for x in range(W):
+def draw_tiles(x0: int, y0: int, x1: int, y1: int):
+    c = camera.cell
+    for y in range(y0, y1 + 1):
+        for x in range(x0, x1 + 1):
             p = Pos(x, y)
-            color = COLOR_WALK if game_map.tile_at(p).walkable else COLOR_WALL
-            r = pygame.Rect(x * CELL, y * CELL, CELL, CELL)
+            color = COLOR_WALK if state.game_map.tile_at(p).walkable else COLOR_WALL
+            r = pygame.Rect(*camera.to_screen(p), c, c)
             pygame.draw.rect(screen, color, r)
             pygame.draw.rect(screen, GRID_COLOR, r, 1)
 
 def draw_world():
-    draw_tiles()
-    img = bridge_big if bridge_built else sea_big
-    if img:
-        screen.blit(img, (sea.top_left.x * CELL, sea.top_left.y * CELL))
-    for f in features:
-        if isinstance(f, Paper):
-            blit_cell("papirus", f.pos)
-        else:
-            blit_cell(f.sprite_key, f.pos)
-    blit_cell("igrac", player.pos)
+    m = state.game_map
+    camera.follow(state.player.pos, m.w, m.h)
+    x0, y0, x1, y1 = camera.visible_cells(m.w, m.h)
+    screen.fill(COLOR_WALL)
+    draw_tiles(x0, y0, x1, y1)
+    for y in range(y0, y1 + 1):
+        for x in range(x0, x1 + 1):
+            p = Pos(x, y)
+            r = state.regions.region_at(p)
+            if r is not None:
+                blit_cell(r.bridge_key if r.bridged else r.sprite_key, p)
+            f = state.features.at(p)
+            if f is None:
+                continue
+            if isinstance(f, Paper):
+                blit_cell("papirus", f.pos)
+            else:
+                blit_cell(f.sprite_key, f.pos)
+    blit_cell("igrac", state.player.pos)
 
 def draw_paper():
     draw_dim()
     sw, sh = screen.get_size()
+    paper_original = sprite_cache.source("papir")
+    if sprite_cache.loading("papir"):
+        return
     if paper_original is None:
         screen.blit(F(26).render("papir.png nije pronađen", True, (255, 255, 255)), (20, 20))
         return
     iw, ih = paper_original.get_size()
-    sc = min((sw * 0.92) / iw, (sh * 0.92) / ih)
-    nw, nh = int(iw * sc), int(ih * sc)
-    big = pygame.transform.scale(paper_original, (nw, nh))
-    screen.blit(big, ((sw - nw) // 2, (sh - nh) // 2))
+    side = max(iw, ih) * min((sw * 0.92) / iw, (sh * 0.92) / ih)
+    sc = snap(int(side), PAPER_STEP) / max(iw, ih)
+    nw, nh = max(1, int(iw * sc)), max(1, int(ih * sc))
+    big = sprite_cache.get("papir", nw, nh)
+    if big is not None:
+        screen.blit(big, ((sw - nw) // 2, (sh - nh) // 2))
     screen.blit(F(26).render("SPACE/ENTER/ESC za zatvoriti", True, (255, 255, 255)), (20, sh - 30))
 
 def draw_code():
@@ -581,7 +401,7 @@ def draw_code():
     screen.blit(F(24).render("ENTER potvrdi | BACKSPACE briše | ESC izlaz", True, (255, 255, 255)), (20, 140))
 
 def update_exit_animation():
-    if game_finished:
+    if state.finished:
         return
     global mode
     if pygame.time.get_ticks() - exit_start_ms >= 2600:
@@ -603,95 +423,101 @@ def draw_exit():
         pygame.draw.circle(screen, (255, 255, 255), (int(p[0]), int(p[1])), max(1, int(3 * p[4])))
 
 def move(dx: int, dy: int):
-    if mode != MODE_PLAY or game_finished:
+    if mode != MODE_PLAY or state.finished:
         return
-    np = Pos(player.pos.x + dx, player.pos.y + dy)
-    if not game_map.in_bounds(np):
+    np = Pos(state.player.pos.x + dx, state.player.pos.y + dy)
+    if not state.game_map.in_bounds(np):
         return
-    if not game_map.tile_at(np).walkable:
+    if not state.game_map.tile_at(np).walkable:
         return
-    if not can_enter(np):
+    if not state.can_enter(np):
         return
-    player.pos = np
-    try_collect(player.pos)
-    auto_try_terminal()
-
-try_collect(player.pos)
-
-running = True
-while running:
-    for e in pygame.event.get():
-        if e.type == pygame.QUIT:
-            running = False
-            break
-
-        if e.type != pygame.KEYDOWN:
-            continue
-
-        if e.key == pygame.K_ESCAPE:
-            if mode in (MODE_PAPER, MODE_CODE):
-                mode = MODE_PLAY
-                auto_code_active = False
-            else:
-                running = False
-            continue
-
-        if game_finished:
-            continue
-
-        if mode == MODE_PLAY:
-            if e.key == pygame.K_1:
-                start_auto("bfs")
-            elif e.key == pygame.K_2:
-                start_auto("dfs")
-            elif e.key == pygame.K_3:
-                start_auto_astar()
-
-        if e.key in (
-            pygame.K_w, pygame.K_UP, pygame.K_s, pygame.K_DOWN,
-            pygame.K_a, pygame.K_LEFT, pygame.K_d, pygame.K_RIGHT
-        ) and auto_active:
-            stop_auto()
-
-        if mode == MODE_PAPER:
-            if e.key in (pygame.K_SPACE, pygame.K_RETURN, pygame.K_KP_ENTER):
-                mode = MODE_PLAY
-            continue
-
-        if mode == MODE_CODE:
-            if not auto_code_active:
-                if e.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
-                    if code_input == SECRET_CODE:
-                        terminal_unlocked = True
-                        popup.show("Uspješno upisana lozinka. Rešetka je podignuta")
-                        mode = MODE_PLAY
-                        if auto_active and auto_kind == "astar":
-                            astar_replan()
-                    else:
-                        popup.show("Kriva lozinka, pokušaj opet", 1700)
-                        code_input = ""
-                elif e.key == pygame.K_BACKSPACE:
-                    code_input = code_input[:-1]
-                elif len(code_input) < len(SECRET_CODE) and e.unicode.isdigit():
-                    code_input += e.unicode
-            continue
-
-        if mode == MODE_PLAY:
-            if e.key in (pygame.K_w, pygame.K_UP):
-                move(0, -1)
-            elif e.key in (pygame.K_s, pygame.K_DOWN):
-                move(0, 1)
-            elif e.key in (pygame.K_a, pygame.K_LEFT):
-                move(-1, 0)
-            elif e.key in (pygame.K_d, pygame.K_RIGHT):
-                move(1, 0)
-
-    update_auto()
-    auto_type_code()
-
-    if mode == MODE_EXIT:
-        update_exit_animation()
+    state.move_to(np)
+
+def new_game():
+    global state, mode, code_input
+    if state is not None:
+        stop_auto()
+    player, features, regions, start = build_level()
+    state = Game(GameMap(regions.w, regions.h, build_walkable()), player, features, regions, start)
+    mode = MODE_PLAY
+    code_input = ""
+    state.try_collect(player.pos)
+
+def init_display():
+    global screen, clock
+    pygame.display.init()
+    sprite_cache.max_px = max_cell_px()
+    sprite_cache.prefetch(SPRITE_KEYS)
+    pygame.font.init()
+    screen = pygame.display.set_mode((VIEW_W * CELL, VIEW_H * CELL), pygame.RESIZABLE)
+    camera.resize(*screen.get_size())
+    pygame.display.set_caption("Escape Room")
+    clock = pygame.time.Clock()
+
+def handle_key(e) -> bool:
+    global mode, code_input, auto_code_active
+    if e.key == pygame.K_ESCAPE:
+        if mode in (MODE_PAPER, MODE_CODE):
+            mode = MODE_PLAY
+            auto_code_active = False
+            return True
+        return False
+
+    if state.finished:
+        return True
+
+    if mode == MODE_PLAY:
+        if e.key == pygame.K_1:
+            start_auto("bfs")
+        elif e.key == pygame.K_2:
+            start_auto("dfs")
+        elif e.key == pygame.K_3:
+            start_auto("astar")
+        elif e.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+            set_zoom(1)
+        elif e.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+            set_zoom(-1)
+
+    if e.key in (
+        pygame.K_w, pygame.K_UP, pygame.K_s, pygame.K_DOWN,
+        pygame.K_a, pygame.K_LEFT, pygame.K_d, pygame.K_RIGHT
+    ) and state.auto is not None:
+        stop_auto()
+
+    if mode == MODE_PAPER:
+        if e.key in (pygame.K_SPACE, pygame.K_RETURN, pygame.K_KP_ENTER):
+            mode = MODE_PLAY
+        return True
+
+    if mode == MODE_CODE:
+        if not auto_code_active:
+            if e.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
+                if code_input == SECRET_CODE:
+                    popup.show("Uspješno upisana lozinka. Rešetka je podignuta")
+                    mode = MODE_PLAY
+                    state.unlock_terminal()
+                else:
+                    popup.show("Kriva lozinka, pokušaj opet", 1700)
+                    code_input = ""
+            elif e.key == pygame.K_BACKSPACE:
+                code_input = code_input[:-1]
+            elif len(code_input) < len(SECRET_CODE) and e.unicode.isdigit():
+                code_input += e.unicode
+        return True
+
+    if mode == MODE_PLAY:
+        if e.key in (pygame.K_w, pygame.K_UP):
+            move(0, -1)
+        elif e.key in (pygame.K_s, pygame.K_DOWN):
+            move(0, 1)
+        elif e.key in (pygame.K_a, pygame.K_LEFT):
+            move(-1, 0)
+        elif e.key in (pygame.K_d, pygame.K_RIGHT):
+            move(1, 0)
+    return True
 
+def draw_frame():
     draw_world()
 
     if mode == MODE_PAPER:
@@ -703,7 +529,50 @@ while running:
 
     popup.draw(screen)
 
-    pygame.display.flip()
-    clock.tick(60)
+def main():
+    t0 = time.perf_counter()
+    init_display()
+    new_game()
+    first_frame = True
+
+    running = True
+    while running:
+        for e in pygame.event.get():
+            if e.type == pygame.QUIT:
+                running = False
+                break
+            if e.type == pygame.VIDEORESIZE:
+                camera.resize(e.w, e.h)
+                continue
+            if e.type == pygame.KEYDOWN and not handle_key(e):
+                running = False
+                break
+
+        update_auto()
+        auto_type_code()
+
+        if mode == MODE_EXIT:
+            update_exit_animation()
+
+        draw_frame()
+        pygame.display.flip()
+
+        if first_frame:
+            first_frame = False
+            if TIMING:
+                now = time.perf_counter()
+                print(f"import: {IMPORT_MS:.1f} ms, prvi okvir: {(now - t0) * 1000:.1f} ms "
+                      f"(ukupno {(now - _T_IMPORT) * 1000:.1f} ms)", file=sys.stderr)
+        else:
+            sprite_cache.warm(SPRITE_KEYS, camera.cell)
+
+        clock.tick(60)
+
+    if TIMING:
+        print(f"plan cache: {state.plan_cache.stats()}", file=sys.stderr)
+    pygame.quit()
+
+IMPORT_MS = (time.perf_counter() - _T_IMPORT) * 1000
 
-pygame.quit()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+from __future__ import annotations
+import time
+from collections import deque
+
+import pretraga
+from pretraga import PlanCache, manhattan, tree_path_between
+from razine import (
+    Pos, Feature, GameMap, EntityStore, RegionMap, Player, build_graph,
+    Door, Key, Axe, Paper, Tree, Exit, Terminal, Bars
+)
+
+AUTO_KINDS = ("bfs", "dfs", "astar")
+
+class GameState:
+    def __init__(self, game_map: GameMap, player: Player, features: EntityStore,
+                 regions: RegionMap, start: Pos):
+        self.game_map = game_map
+        self.player = player
+        self.features = features
+        self.regions = regions
+        self.start = start
+        self.has_key = self.has_axe = self.has_wood = self.has_paper = False
+        self.terminal_unlocked = False
+        self.finished = False
+        self.auto: AutoPilot | None = None
+        self.graf = None
+        self.plan_cache = PlanCache()
+        self.plan_epoch = 0
+        self.expansions = 0
+        self.plan_s = 0.0
+
+    def message(self, text: str, ms: int = 1700):
+        pass
+
+    def on_paper(self):
+        pass
+
+    def on_code_prompt(self):
+        self.unlock_terminal()
+
+    def on_exit(self):
+        pass
+
+    def on_plan_change(self):
+        if self.auto is not None:
+            self.auto.on_plan_change()
+
+    def planning_graph(self):
+        if self.graf is None:
+            self.graf = build_graph(self.game_map.walkable)
+        return self.graf
+
+    def bump_epoch(self):
+        self.plan_epoch += 1
+
+    def remove_feature(self, f: Feature):
+        if self.features.remove(f):
+            self.bump_epoch()
+
+    def unlock_terminal(self):
+        self.terminal_unlocked = True
+        self.bump_epoch()
+        self.on_plan_change()
+
+    def enter_door(self, f: Feature):
+        if not self.has_key:
+            self.message("Vrata su zaključana")
+            return False
+        self.remove_feature(f)
+        self.message("Vrata su otključana")
+        return True
+
+    def enter_bars(self, f: Feature):
+        if self.terminal_unlocked:
+            self.remove_feature(f)
+            return True
+        self.message("Rešetka je spuštena. Upiši šifru")
+        return False
+
+    ENTER_RULES = {Door: enter_door, Bars: enter_bars}
+
+    def can_enter(self, p: Pos):
+        if self.finished:
+            return False
+
+        f = self.features.at(p)
+        if f is not None:
+            rule = self.ENTER_RULES.get(type(f))
+            if rule is not None:
+                return rule(self, f)
+
+        r = self.regions.blocking(p)
+        if r is not None:
+            if self.has_axe and self.has_wood:
+                self.regions.build_bridge(r)
+                self.bump_epoch()
+                self.message("Most je izgrađen")
+                return True
+            self.message("Treba ti sjekira i drvo za izgradnju mosta", 2200)
+            return False
+
+        return True
+
+    def collect_key(self, f: Feature):
+        self.has_key = True
+        self.remove_feature(f)
+        self.message("Ključ pokupljen")
+        self.on_plan_change()
+
+    def collect_axe(self, f: Feature):
+        self.has_axe = True
+        self.remove_feature(f)
+        self.message("Sjekira pokupljena")
+        self.on_plan_change()
+
+    def collect_paper(self, f: Feature):
+        self.has_paper = True
+        self.remove_feature(f)
+        self.on_paper()
+        self.on_plan_change()
+
+    def collect_tree(self, f: Feature):
+        if not self.has_axe:
+            self.message("Treba ti sjekira da posiječeš drvo")
+            return
+        self.has_wood = True
+        self.remove_feature(f)
+        self.message("Posijekao si drvo za most")
+        self.on_plan_change()
+
+    def collect_terminal(self, f: Feature):
+        if not self.has_paper:
+            self.message("Upiši šifru")
+            return
+        if self.terminal_unlocked:
+            self.message("Terminal je već otključan.")
+            return
+        self.on_code_prompt()
+
+    def collect_bars(self, f: Feature):
+        self.message("Rešetka je spuštena. Upiši šifru")
+
+    def collect_exit(self, f: Feature):
+        self.finished = True
+        if self.auto is not None:
+            self.auto.stop()
+        self.on_exit()
+
+    COLLECT_RULES = {
+        Key: collect_key, Axe: collect_axe, Paper: collect_paper, Tree: collect_tree,
+        Terminal: collect_terminal, Bars: collect_bars, Exit: collect_exit,
+    }
+
+    def try_collect(self, p: Pos):
+        if self.finished:
+            return
+        f = self.features.at(p)
+        if f is None:
+            return
+        rule = self.COLLECT_RULES.get(type(f))
+        if rule is not None:
+            rule(self, f)
+
+    def move_to(self, p: Pos):
+        self.player.pos = p
+        self.try_collect(p)
+
+    PLAN_RULES = {Door: lambda self, f: self.has_key, Bars: lambda self, f: self.terminal_unlocked}
+
+    def passable_plan(self, p: Pos):
+        f = self.features.at(p)
+        if f is not None:
+            rule = self.PLAN_RULES.get(type(f))
+            if rule is not None and not rule(self, f):
+                return False
+        if self.regions.blocking(p) is not None:
+            return bool(self.has_axe and self.has_wood)
+        return True
+
+    def _timed(self, compute):
+        t0 = time.perf_counter()
+        out = compute()
+        self.plan_s += time.perf_counter() - t0
+        return out
+
+    def _tree(self, kind: str, start: Pos):
+        tree = pretraga.bfs_tree if kind == "bfs" else pretraga.dfs_tree
+        order, parent = self._timed(lambda: tree(self.planning_graph(), start))
+        self.expansions += len(order)
+        return order, parent
+
+    def bfs_tree(self, start: Pos):
+        return self.plan_cache.get_or_compute(("bfs", start), lambda: self._tree("bfs", start))
+
+    def dfs_tree(self, start: Pos):
+        return self.plan_cache.get_or_compute(("dfs", start), lambda: self._tree("dfs", start))
+
+    def _astar(self, start: Pos, goal: Pos):
+        stats = {}
+        path = self._timed(
+            lambda: pretraga.astar_path(self.planning_graph(), start, goal, self.passable_plan, stats)
+        )
+        self.expansions += stats.get("expanded", 0)
+        return path
+
+    def astar_path(self, start: Pos, goal: Pos):
+        return self.plan_cache.get_or_compute(
+            ("astar", start, goal, self.plan_epoch), lambda: self._astar(start, goal)
+        )
+
+    def find_first(self, cls):
+        f = self.features.first(cls)
+        return None if f is None else f.pos
+
+    def nearest(self, cls):
+        pts = [f.pos for f in self.features.of_type(cls)]
+        return min(pts, key=lambda p: manhattan(self.player.pos, p)) if pts else None
+
+    def _dry_area(self):
+        g = self.planning_graph()
+        dry = pretraga.reachable(
+            g, self.player.pos, lambda p: self.passable_plan(p) and self.regions.blocking(p) is None
+        )
+        entries = tuple(
+            e for r in self.regions.open_regions() for e in r.entries
+            if any(n in dry for n in g.get(e, []))
+        )
+        return dry, entries
+
+    def nearest_sea_entry(self, goal: Pos):
+        dry, entries = self.plan_cache.get_or_compute(
+            ("dry", self.plan_epoch), lambda: self._timed(self._dry_area)
+        )
+        if goal in dry:
+            return None
+        return min(entries, key=lambda p: manhattan(self.player.pos, p)) if entries else None
+
+    def astar_next_goal(self):
+        if not self.has_key:
+            return self.nearest(Key)
+        d = self.find_first(Door)
+        if d is not None:
+            return d
+        if not self.has_paper:
+            return self.nearest(Paper)
+        if not self.has_axe:
+            return self.nearest(Axe)
+        if not self.has_wood:
+            return self.nearest(Tree)
+        goal = self.find_first(Exit) if self.terminal_unlocked else self.nearest(Terminal)
+        if goal is None:
+            return None
+        return self.nearest_sea_entry(goal) or goal
+
+class AutoPilot:
+    def __init__(self, state: GameState, kind: str):
+        self.state = state
+        self.kind = kind
+        self.targets: deque[Pos] = deque()
+        self.parent = {}
+        self.subpath: list[Pos] = []
+        self.target = None
+
+    @property
+    def active(self) -> bool:
+        return self.state.auto is self
+
+    def start(self):
+        self.state.auto = self
+        if self.kind == "astar":
+            self.replan()
+        else:
+            self.restart()
+
+    def stop(self):
+        if self.active:
+            self.state.auto = None
+        self.targets.clear()
+        self.subpath, self.target = [], None
+
+    def restart(self):
+        tree = self.state.bfs_tree if self.kind == "bfs" else self.state.dfs_tree
+        order, self.parent = tree(self.state.player.pos)
+        self.targets = deque(order)
+        self.subpath, self.target = [], None
+
+    def replan(self):
+        if not self.active:
+            return
+        goal = self.state.astar_next_goal()
+        if goal is None:
+            self.state.message("Nema cilja na mapi")
+            self.stop()
+            return
+        path = self.state.astar_path(self.state.player.pos, goal)
+        if not path and goal != self.state.player.pos:
+            self.stop()
+            return
+        self.subpath, self.target = path[:], goal
+
+    def on_plan_change(self):
+        if self.kind == "dfs":
+            self.restart()
+        elif self.kind == "astar":
+            self.replan()
+
+    def step(self):
+        st = self.state
+        if st.finished or not self.active:
+            return
+
+        if self.kind == "astar":
+            if not self.subpath:
+                self.replan()
+                if not self.subpath:
+                    return
+
+            nxt = self.subpath[0]
+            if not st.can_enter(nxt):
+                self.replan()
+                return
+
+            self.subpath.pop(0)
+            st.move_to(nxt)
+
+            if self.target == st.player.pos and self.active:
+                self.replan()
+            return
+
+        while not self.subpath:
+            if not self.targets:
+                self.stop()
+                return
+            t = self.targets.popleft()
+            if t == st.player.pos:
+                continue
+            self.target = t
+            self.subpath = tree_path_between(st.player.pos, t, self.parent)
+            if not self.subpath:
+                self.target = None
+
+        nxt = self.subpath[0]
+        if not st.can_enter(nxt):
+            if self.target is not None:
+                self.targets.append(self.target)
+            self.subpath, self.target = [], None
+            return
+
+        self.subpath.pop(0)
+        st.move_to(nxt)
+        if self.target == st.player.pos:
+            self.target = None
@@ -0,0 +1,156 @@
+from __future__ import annotations
+from collections import OrderedDict, deque
+from typing import Any, Callable, Hashable
+
+from razine import Pos
+
+INF = 10**9
+
+Graph = dict[Pos, list[Pos]]
+
+class PlanCache:
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._data: OrderedDict[Hashable, Any] = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]):
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            value = self._data[key] = compute()
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+            return value
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def clear(self):
+        self._data.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data), "hits": self.hits, "misses": self.misses,
+            "evictions": self.evictions, "hit_rate": round(self.hit_rate, 3),
+        }
+
+def manhattan(a: Pos, b: Pos):
+    return abs(a.x - b.x) + abs(a.y - b.y)
+
+def reachable(graf: Graph, start: Pos, passable: Callable[[Pos], bool]) -> set[Pos]:
+    seen = {start}
+    q = deque([start])
+    while q:
+        u = q.popleft()
+        for v in graf.get(u, []):
+            if v not in seen and passable(v):
+                seen.add(v)
+                q.append(v)
+    return seen
+
+def bfs_tree(graf: Graph, start: Pos):
+    q = deque([start])
+    vis = {start}
+    parent = {start: None}
+    order = []
+    while q:
+        u = q.popleft()
+        order.append(u)
+        for v in graf.get(u, []):
+            if v not in vis:
+                vis.add(v)
+                parent[v] = u
+                q.append(v)
+    return order, parent
+
+def dfs_tree(graf: Graph, start: Pos):
+    st = [start]
+    vis = set()
+    parent = {start: None}
+    order = []
+    while st:
+        u = st.pop()
+        if u in vis:
+            continue
+        vis.add(u)
+        order.append(u)
+        for v in reversed(graf.get(u, [])):
+            if v not in vis:
+                parent.setdefault(v, u)
+                st.append(v)
+    return order, parent
+
+def tree_path_between(a: Pos, b: Pos, parent):
+    if a == b:
+        return []
+    anc = set()
+    x = a
+    while x is not None:
+        anc.add(x)
+        x = parent.get(x)
+
+    path_b = []
+    y = b
+    while y not in anc and y is not None:
+        path_b.append(y)
+        y = parent.get(y)
+
+    lca = y
+    if lca is None:
+        return []
+
+    up = []
+    x = a
+    while x != lca and x is not None:
+        x = parent.get(x)
+        if x is None:
+            return []
+        up.append(x)
+
+    return up + list(reversed(path_b))
+
+def astar_path(graf: Graph, start: Pos, goal: Pos, passable: Callable[[Pos], bool],
+               stats: dict | None = None):
+    if start == goal:
+        return []
+    open_set = {start}
+    came = {}
+    g = {start: 0}
+    f = {start: manhattan(start, goal)}
+    expanded = 0
+
+    try:
+        while open_set:
+            cur = min(open_set, key=lambda p: f.get(p, INF))
+            expanded += 1
+            if cur == goal:
+                out = []
+                x = goal
+                while x != start:
+                    out.append(x)
+                    x = came[x]
+                out.reverse()
+                return out
+
+            open_set.remove(cur)
+            for nb in graf.get(cur, []):
+                if not passable(nb):
+                    continue
+                tg = g[cur] + 1
+                if tg < g.get(nb, INF):
+                    came[nb] = cur
+                    g[nb] = tg
+                    f[nb] = tg + manhattan(nb, goal)
+                    open_set.add(nb)
+        return []
+    finally:
+        if stats is not None:
+            stats["expanded"] = stats.get("expanded", 0) + expanded
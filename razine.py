@@ -1,6 +1,6 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import ClassVar, Iterable
+from typing import ClassVar, Iterable, Iterator
 
 @dataclass(frozen=True, slots=True)
 class Pos:
@@ -13,6 +13,7 @@ class Tile:
 
 WALL = Tile(False)
 FLOOR = Tile(True)
+DIRS4 = [(-1, 0), (1, 0), (0, -1), (0, 1)]
 
 class MapBuilder:
     def __init__(self, w: int, h: int):
@@ -77,20 +78,80 @@ def build_walkable() -> set[Pos]:
 
     return b.walkable
 
+def build_graph(walkable: set[Pos]) -> dict[Pos, list[Pos]]:
+    graf = {}
+    for p in walkable:
+        graf[p] = [Pos(p.x + dx, p.y + dy) for dx, dy in DIRS4 if Pos(p.x + dx, p.y + dy) in walkable]
+    return graf
+
 class Feature:
     sprite_key: ClassVar[str] = ""
+    __slots__ = ("pos", "id")
     def __init__(self, pos: Pos):
         self.pos = pos
+        self.id = -1
+
+class Player(Feature):   __slots__ = (); sprite_key = "igrac"
+class Door(Feature):     __slots__ = (); sprite_key = "vrata"
+class Key(Feature):      __slots__ = (); sprite_key = "kljuc"
+class Axe(Feature):      __slots__ = (); sprite_key = "sjekira"
+class Terminal(Feature): __slots__ = (); sprite_key = "terminal"
+class Bars(Feature):     __slots__ = (); sprite_key = "resetke"
+class Paper(Feature):    __slots__ = (); sprite_key = "papir"
+class Exit(Feature):     __slots__ = (); sprite_key = "zastava"
+class Tree(Feature):     __slots__ = (); sprite_key = "drvo"
+
+class EntityStore:
+    __slots__ = ("_items", "_live", "_at", "_by_type")
+
+    def __init__(self, features: Iterable[Feature] = ()):
+        self._items: list[Feature | None] = []
+        self._live = 0
+        self._at: dict[Pos, int] = {}
+        self._by_type: dict[type, dict[int, None]] = {}
+        for f in features:
+            self.add(f)
+
+    def add(self, f: Feature) -> int:
+        eid = len(self._items)
+        self._items.append(f)
+        self._live += 1
+        f.id = eid
+        self._at[f.pos] = eid
+        self._by_type.setdefault(type(f), {})[eid] = None
+        return eid
+
+    def remove(self, f: Feature) -> bool:
+        eid = f.id
+        if not (0 <= eid < len(self._items)) or self._items[eid] is not f:
+            return False
+        self._items[eid] = None
+        self._live -= 1
+        if self._at.get(f.pos) == eid:
+            del self._at[f.pos]
+        del self._by_type[type(f)][eid]
+        f.id = -1
+        return True
+
+    def get(self, eid: int) -> Feature | None:
+        return self._items[eid] if 0 <= eid < len(self._items) else None
 
-class Player(Feature):   sprite_key = "igrac"
-class Door(Feature):     sprite_key = "vrata"
-class Key(Feature):      sprite_key = "kljuc"
-class Axe(Feature):      sprite_key = "sjekira"
-class Terminal(Feature): sprite_key = "terminal"
-class Bars(Feature):     sprite_key = "resetke"
-class Paper(Feature):    sprite_key = "papir"
-class Exit(Feature):     sprite_key = "zastava"
-class Tree(Feature):     sprite_key = "drvo"
+    def at(self, p: Pos) -> Feature | None:
+        eid = self._at.get(p)
+        return None if eid is None else self._items[eid]
+
+    def of_type(self, cls: type) -> Iterator[Feature]:
+        items = self._items
+        return (items[eid] for eid in self._by_type.get(cls, ()))
+
+    def first(self, cls: type) -> Feature | None:
+        return next(self.of_type(cls), None)
+
+    def __len__(self) -> int:
+        return self._live
+
+    def __iter__(self) -> Iterator[Feature]:
+        return (f for f in self._items if f is not None)
 
 class SeaArea:
     sprite_key: ClassVar[str] = "voda"
@@ -110,10 +171,65 @@ class SeaArea:
             and self.top_left.y <= p.y < self.top_left.y + self.height_cells
         )
 
+class Region:
+    sprite_key: ClassVar[str] = "voda"
+    bridge_key: ClassVar[str] = "most"
+    __slots__ = ("id", "cells", "entries", "bridged")
+
+    def __init__(self, rid: int, cells: frozenset[Pos]):
+        self.id = rid
+        self.cells = cells
+        self.entries: frozenset[Pos] = frozenset()
+        self.bridged = False
+
+class RegionMap:
+    def __init__(self, w: int, h: int):
+        self.w, self.h = w, h
+        self.grid = [-1] * (w * h)
+        self.regions: list[Region] = []
+
+    def add(self, cells: Iterable[Pos]) -> Region:
+        r = Region(len(self.regions), frozenset(
+            c for c in cells if 0 <= c.x < self.w and 0 <= c.y < self.h
+        ))
+        for c in r.cells:
+            if self.grid[c.y * self.w + c.x] != -1:
+                raise ValueError(f"ćelija {c} već pripada regiji")
+            self.grid[c.y * self.w + c.x] = r.id
+        self.regions.append(r)
+        return r
+
+    def finalize(self, walkable: set[Pos]) -> "RegionMap":
+        for r in self.regions:
+            r.entries = frozenset(
+                c for c in r.cells
+                if any(
+                    n in walkable and self.region_at(n) is not r
+                    for n in (Pos(c.x + dx, c.y + dy) for dx, dy in DIRS4)
+                )
+            )
+        return self
+
+    def region_at(self, p: Pos) -> Region | None:
+        if not (0 <= p.x < self.w and 0 <= p.y < self.h):
+            return None
+        rid = self.grid[p.y * self.w + p.x]
+        return None if rid < 0 else self.regions[rid]
+
+    def blocking(self, p: Pos) -> Region | None:
+        r = self.region_at(p)
+        return None if r is None or r.bridged else r
+
+    def build_bridge(self, r: Region) -> None:
+        r.bridged = True
+
+    def open_regions(self) -> Iterable[Region]:
+        return (r for r in self.regions if not r.bridged)
+
 def build_level():
     start = Pos(5, 0)
     player = Player(start)
-    features: list[Feature] = [
+    features = EntityStore([
         Door(Pos(2, 7)),
         Key(Pos(6, 6)),
         Paper(Pos(0, 9)),
@@ -123,6 +239,38 @@ def build_level():
         Exit(Pos(7, 16)),
         Terminal(Pos(7, 14)),
         Terminal(Pos(10, 15)),
-    ]
-    sea = SeaArea(top_left=Pos(9, 7), width_cells=1, height_cells=4)
-    return player, features, sea, start
+    ])
+    regions = RegionMap(11, 17)
+    regions.add(SeaArea(top_left=Pos(9, 7), width_cells=1, height_cells=4).cells())
+    regions.finalize(build_walkable())
+    return player, features, regions, start
+
+FEATURE_TYPES: dict[str, type[Feature]] = {
+    cls.__name__: cls for cls in (Door, Key, Axe, Terminal, Bars, Paper, Exit, Tree)
+}
+
+def level_from_dict(d: dict):
+    w, h = d["w"], d["h"]
+    walkable = {Pos(x, y) for x, y in d["walkable"]}
+    start = Pos(*d["start"])
+    features = EntityStore(FEATURE_TYPES[name](Pos(x, y)) for name, x, y in d.get("features", ()))
+    regions = RegionMap(w, h)
+    for cells in d.get("regions", ()):
+        regions.add(Pos(x, y) for x, y in cells)
+    regions.finalize(walkable)
+    return GameMap(w, h, walkable), Player(start), features, regions, start
+
+def level_to_dict(game_map: GameMap, features: EntityStore, regions: RegionMap, start: Pos) -> dict:
+    return {
+        "w": game_map.w,
+        "h": game_map.h,
+        "walkable": sorted([p.x, p.y] for p in game_map.walkable),
+        "start": [start.x, start.y],
+        "features": [[type(f).__name__, f.pos.x, f.pos.y] for f in features],
+        "regions": [sorted([c.x, c.y] for c in r.cells) for r in regions.regions],
+    }
+
+if __name__ == "__main__":
+    import json
+    _, features, regions, start = build_level()
+    print(json.dumps(level_to_dict(GameMap(11, 17, build_walkable()), features, regions, start)))
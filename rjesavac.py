@@ -0,0 +1,126 @@
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Iterator
+
+from pravila import AUTO_KINDS, AutoPilot, GameState
+from razine import Pos, level_from_dict
+
+STRATEGIES = AUTO_KINDS
+MAX_STEPS = 20_000
+
+class Sim(GameState):
+    def __init__(self, level: dict):
+        super().__init__(*level_from_dict(level))
+        self.route: list[Pos] = []
+
+    def move_to(self, p: Pos):
+        self.route.append(p)
+        super().move_to(p)
+
+    def run(self, kind: str, max_steps: int = MAX_STEPS):
+        self.try_collect(self.player.pos)
+        auto = AutoPilot(self, kind)
+        auto.start()
+        budget = max_steps
+        while not self.finished and auto.active and budget > 0:
+            budget -= 1
+            auto.step()
+
+def solve(level: dict, kind: str, max_steps: int = MAX_STEPS) -> dict:
+    t0 = time.perf_counter()
+    sim = Sim(level)
+    sim.run(kind, max_steps)
+    return {
+        "solved": sim.finished,
+        "steps": len(sim.route),
+        "route": [[p.x, p.y] for p in sim.route],
+        "expansions": sim.expansions,
+        "plan_ms": round(sim.plan_s * 1000, 3),
+        "total_ms": round((time.perf_counter() - t0) * 1000, 3),
+    }
+
+def solve_item(item: tuple[str, str | None], kind: str, max_steps: int) -> dict:
+    source, text = item
+    out = {"source": source, "strategy": kind}
+    try:
+        if text is None:
+            text = Path(source).read_text(encoding="utf-8")
+        out.update(solve(json.loads(text), kind, max_steps))
+    except Exception as e:
+        out["error"] = f"{type(e).__name__}: {e}"
+    return out
+
+def iter_lines(name: str, fh) -> Iterator[tuple[str, str | None]]:
+    for i, line in enumerate(fh, 1):
+        if line.strip():
+            yield f"{name}:{i}", line
+
+def iter_dir(path: str) -> Iterator[tuple[str, str | None]]:
+    with os.scandir(path) as it:
+        for e in it:
+            if e.is_dir():
+                yield from iter_dir(e.path)
+            elif e.name.endswith(".jsonl"):
+                yield from iter_file(e.path)
+            elif e.name.endswith(".json"):
+                yield e.path, None
+
+def iter_file(path: str) -> Iterator[tuple[str, str | None]]:
+    if not path.endswith(".jsonl"):
+        yield path, None
+        return
+    with open(path, encoding="utf-8") as fh:
+        yield from iter_lines(path, fh)
+
+def iter_sources(paths: list[str]) -> Iterator[tuple[str, str | None]]:
+    for p in paths or ["-"]:
+        if p == "-":
+            yield from iter_lines("<stdin>", sys.stdin)
+        elif os.path.isdir(p):
+            yield from iter_dir(p)
+        else:
+            yield from iter_file(p)
+
+def solve_stream(items, kind: str, jobs: int, window: int, max_steps: int = MAX_STEPS) -> Iterator[dict]:
+    if jobs <= 1:
+        for item in items:
+            yield solve_item(item, kind, max_steps)
+        return
+    with ProcessPoolExecutor(jobs) as ex:
+        pending = set()
+        for item in items:
+            pending.add(ex.submit(solve_item, item, kind, max_steps))
+            if len(pending) >= window:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    yield fut.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                yield fut.result()
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Rješava razine bez igre i ispisuje JSONL rezultate.")
+    ap.add_argument("paths", nargs="*", help="datoteke (.json, .jsonl), direktoriji ili - za stdin")
+    ap.add_argument("-s", "--strategy", choices=STRATEGIES, default="astar")
+    ap.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("-w", "--window", type=int, default=0,
+                    help="najviše razina u obradi odjednom (zadano 4 * jobs)")
+    ap.add_argument("--max-steps", type=int, default=MAX_STEPS)
+    args = ap.parse_args(argv)
+
+    window = args.window or 4 * max(1, args.jobs)
+    out = sys.stdout
+    for rec in solve_stream(iter_sources(args.paths), args.strategy, args.jobs, window, args.max_steps):
+        out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        out.flush()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())